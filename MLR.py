@@ -2,15 +2,18 @@ import os
 import pandas as pd
 import streamlit as st
 import polars as pl
-import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
 from datetime import datetime, date, timedelta
 import pyodbc
-import toml
+import tomllib
 import plotly.graph_objects as go
 import io
+import time
+import shutil
 import zipfile
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 
 # Configure the page
 st.set_page_config(
@@ -33,30 +36,28 @@ THRESHOLDS = [65, 75, 85]
 # Benefit group functions
 @st.cache_data(ttl=7200)  # 2 hours cache for benefit codes
 def load_benefit_codes():
-    """Load procedure codes from benefits_cleaned.csv"""
+    """Load procedure codes from benefits_cleaned.csv as a benefit -> codes map.
+
+    The map is built once per cache period with lowercased keys and codes so the
+    tabs can filter PA procedure codes without re-parsing the CSV on every rerun.
+    """
     try:
-        import csv
-        benefit_codes = {}
-        
-        with open('benefits_cleaned.csv', 'r', encoding='utf-8') as file:
-            reader = csv.DictReader(file)
-            for row in reader:
-                benefit_group = row['benefit_group']
-                procedure_code = row['procedure_code']
-                
-                if benefit_group not in benefit_codes:
-                    benefit_codes[benefit_group] = []
-                benefit_codes[benefit_group].append(procedure_code)
-        
+        benefits = pl.read_csv('benefits_cleaned.csv')
+        benefit_codes = {
+            str(group).lower(): frozenset(
+                code.lower() for code in sub['procedure_code'].drop_nulls().to_list()
+            )
+            for (group,), sub in benefits.group_by('benefit_group')
+        }
         return benefit_codes
     except Exception as e:
         st.error(f"Error loading benefit codes: {str(e)}")
         return {}
 
 def get_procedure_codes_for_benefit_group(benefit_group_name):
-    """Get procedure codes for a specific benefit group"""
+    """Get lowercased procedure codes for a specific benefit group"""
     benefit_codes = load_benefit_codes()
-    return benefit_codes.get(benefit_group_name, [])
+    return benefit_codes.get(benefit_group_name.lower(), frozenset())
 
 # Database connection functions (from dlt_sources.py)
 def load_secrets():
@@ -83,7 +84,8 @@ def load_secrets():
     # Fallback to toml file (for local development)
     secrets_path = "secrets.toml"
     if os.path.exists(secrets_path):
-        return toml.load(secrets_path)
+        with open(secrets_path, 'rb') as f:
+            return tomllib.load(f)
     else:
         raise FileNotFoundError(f"Secrets file not found: {secrets_path}. Please set environment variables or create secrets.toml")
 
@@ -135,10 +137,176 @@ def get_database_connections():
         st.error(f"Error loading database configuration: {str(e)}")
         return None, None, None
 
+# Local parquet snapshot so a server restart does not force a full database
+# reload; kept in step with the load_data_from_sources cache TTL
+SNAPSHOT_DIR = "data_cache"
+SNAPSHOT_TTL = 10800
+SNAPSHOT_TABLES = ['PA', 'GROUP_CONTRACT', 'CLAIMS', 'GROUPS', 'DEBIT', 'ACTIVE_ENROLLEE',
+                   'M_PLAN', 'G_PLAN', 'PLAN', 'PROVIDER', 'BENEFIT', 'BEN_CODE']
+
+def _load_snapshot():
+    """Read the last parquet snapshot if it is still fresh, else None"""
+    marker = os.path.join(SNAPSHOT_DIR, 'PA.parquet')
+    try:
+        if os.path.exists(marker) and time.time() - os.path.getmtime(marker) < SNAPSHOT_TTL:
+            frames = {
+                name: pl.read_parquet(os.path.join(SNAPSHOT_DIR, f"{name}.parquet"))
+                for name in SNAPSHOT_TABLES
+            }
+            # Parquet round-trips can degrade categoricals to plain strings
+            frames['PA'] = frames['PA'].with_columns([
+                pl.col('IID').cast(pl.Categorical),
+                pl.col('panumber').cast(pl.Categorical)
+            ])
+            return tuple(frames[name] for name in SNAPSHOT_TABLES)
+    except Exception:
+        pass  # any snapshot problem falls through to a fresh database load
+    return None
+
+def _write_snapshot(frames):
+    """Persist the loaded frames to parquet for fast cold starts"""
+    try:
+        os.makedirs(SNAPSHOT_DIR, exist_ok=True)
+        for name, df in zip(SNAPSHOT_TABLES, frames):
+            df.write_parquet(os.path.join(SNAPSHOT_DIR, f"{name}.parquet"))
+    except Exception as e:
+        st.warning(f"Could not write data snapshot: {str(e)}")
+
+class OdbcPool:
+    """Tiny queue-backed pyodbc connection pool.
+
+    Connections survive across data refreshes so each 3-hourly reload reuses
+    already-authenticated sessions instead of paying TLS + login per query.
+    pyodbc connections are not thread-safe, so each fetch worker checks one out
+    for the duration of its query.
+    """
+    def __init__(self, conn_str, size=5):
+        self._conn_str = conn_str
+        self._size = size
+        self._idle = queue.Queue(maxsize=size)
+        self._created = 0
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def acquire(self):
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                below_cap = self._created < self._size
+                if below_cap:
+                    self._created += 1
+            if below_cap:
+                try:
+                    conn = pyodbc.connect(self._conn_str)
+                    # Decode/encode as UTF-8 so string cells skip the driver's
+                    # per-value UTF-16 transcoding
+                    conn.setdecoding(pyodbc.SQL_CHAR, encoding='utf-8')
+                    conn.setencoding(encoding='utf-8')
+                except Exception:
+                    with self._lock:
+                        self._created -= 1
+                    raise
+            else:
+                conn = self._idle.get()
+        try:
+            yield conn
+        except Exception:
+            # Connection state is suspect after a failed query; drop it
+            with self._lock:
+                self._created -= 1
+            try:
+                conn.close()
+            except Exception:
+                pass
+            raise
+        else:
+            self._idle.put(conn)
+
+@st.cache_resource
+def get_medicloud_pool():
+    """MediCloud connection pool shared across reruns"""
+    medicloud_conn_str, _, _ = get_database_connections()
+    return OdbcPool(medicloud_conn_str, size=5)
+
+@st.cache_resource
+def get_eacount_pool():
+    """EACOUNT connection pool shared across reruns"""
+    _, eacount_conn_str, _ = get_database_connections()
+    return OdbcPool(eacount_conn_str, size=1)
+
+def _rows_to_frame(columns, rows):
+    """Build a DataFrame from raw pyodbc rows; pd.read_sql warns on plain
+    DBAPI connections and coerces types through a slower path"""
+    # coerce_float matches pd.read_sql: SQL Server decimal/money arrive as
+    # Decimal objects and must become float64, not object dtype
+    return pd.DataFrame.from_records((tuple(r) for r in rows), columns=columns, coerce_float=True)
+
+def _fetch_frame(pool, query, params=None):
+    """Run one query on a pooled connection"""
+    with pool.acquire() as conn:
+        cursor = conn.cursor()
+        if params:
+            cursor.execute(query, params)
+        else:
+            cursor.execute(query)
+        columns = [d[0] for d in cursor.description]
+        return _rows_to_frame(columns, cursor.fetchall())
+
+# Tables large enough to stream in chunks rather than materialize in pandas
+CHUNKED_TABLES = {'CLAIMS', 'PA'}
+CHUNK_ROWS = 50000
+
+# Start dates for the rolling query windows, bound as query parameters
+CLAIMS_WINDOW_START = '2024-07-01'
+DEBIT_WINDOW_START = '2023-01-01'
+
+def _fetch_frame_chunked(pool, query, params=None):
+    """Stream a large result set in chunks, converting each chunk to polars as
+    it arrives so the full pandas frame never exists in memory"""
+    with pool.acquire() as conn:
+        cursor = conn.cursor()
+        if params:
+            cursor.execute(query, params)
+        else:
+            cursor.execute(query)
+        columns = [d[0] for d in cursor.description]
+        chunks = []
+        while True:
+            rows = cursor.fetchmany(CHUNK_ROWS)
+            if not rows:
+                break
+            chunks.append(pl.from_pandas(_rows_to_frame(columns, rows)))
+    if not chunks:
+        # Keep the query's schema even with zero rows so downstream casts
+        # and joins still find their columns
+        return pl.from_pandas(_rows_to_frame(columns, []))
+    return pl.concat(chunks, how='vertical_relaxed')
+
+def _fetch_frames_batched(pool, queries):
+    """Run several small parameterless queries in one batch on a single
+    connection, walking the result sets in dict order, so the lookup tables
+    cost one round-trip instead of one each"""
+    batch = ';\n'.join(q.strip().rstrip(';') for q in queries.values())
+    frames = {}
+    with pool.acquire() as conn:
+        cursor = conn.cursor()
+        cursor.execute(batch)
+        for name in queries:
+            columns = [d[0] for d in cursor.description]
+            frames[name] = _rows_to_frame(columns, cursor.fetchall())
+            cursor.nextset()
+    return frames
+
 @st.cache_data(ttl=10800)  # 3 hours = 10800 seconds
 def load_data_from_sources():
     """Load data directly from source databases with caching"""
     try:
+        snapshot = _load_snapshot()
+        if snapshot is not None:
+            st.success("✅ Data loaded from local snapshot (use Force Refresh to reload from source)")
+            return snapshot
+
         medicloud_conn_str, eacount_conn_str, secrets = get_database_connections()
         
         if not all([medicloud_conn_str, eacount_conn_str]):
@@ -149,154 +317,154 @@ def load_data_from_sources():
         progress_bar = st.progress(0)
         status_text = st.empty()
         
-        # Connect to MediCloud database
-        status_text.text("🔌 Connecting to MediCloud database...")
-        progress_bar.progress(5)
-        medicloud_conn = pyodbc.connect(medicloud_conn_str)
-        
-        # Load MediCloud tables with progress tracking
-        status_text.text("📊 Loading group contracts...")
-        progress_bar.progress(10)
-        GROUP_CONTRACT = pd.read_sql("""
-            SELECT 
-            gc.groupid,
-            gc.startdate,
-            gc.enddate,
-            g.groupname
-            FROM dbo.group_contract gc
-            JOIN dbo.[group] g ON gc.groupid = g.groupid
-            WHERE gc.iscurrent = 1
-            AND CAST(gc.enddate AS DATETIME) >= CAST(GETDATE() AS DATETIME);
-        """, medicloud_conn)
-        
-        status_text.text("🏥 Loading claims data (this may take a moment)...")
-        progress_bar.progress(20)
-        CLAIMS = pd.read_sql("""
-            SELECT nhislegacynumber, nhisproviderid, nhisgroupid, panumber, encounterdatefrom, 
-                   datesubmitted, chargeamount, approvedamount, procedurecode, deniedamount 
-            FROM dbo.claims
-            WHERE datesubmitted >= '2024-07-01' AND datesubmitted <= GETDATE();
-        """, medicloud_conn)
-        
-        status_text.text("👥 Loading groups data...")
-        progress_bar.progress(30)
-        GROUPS = pd.read_sql("SELECT * FROM dbo.[group]", medicloud_conn)
-        
-        status_text.text("📋 Loading PA procedures...")
-        progress_bar.progress(40)
-        PA = pd.read_sql("""
-            SELECT
-            txn.panumber,
-            txn.groupname,
-            txn.divisionname,
-            txn.plancode,
-            txn.IID,
-            txn.providerid,
-            txn.requestdate,
-            txn.pastatus,
-            tbp.code,
-            tbp.requested,
-            tbp.granted
-            FROM dbo.tbPATxn txn
-            JOIN dbo.tbPAProcedures tbp ON txn.panumber = tbp.panumber
-            WHERE txn.requestdate >= '2024-07-01' AND txn.requestdate <= GETDATE();
-        """, medicloud_conn)
-        
-        status_text.text("👤 Loading active members...")
-        progress_bar.progress(50)
-        ACTIVE_ENROLLEE = pd.read_sql("""
-            SELECT
-            mc.memberid,
-            m.groupid,
-            m.legacycode,
-            m.planid,
-            mc.iscurrent,
-            m.isterminated,
-            mc.effectivedate,
-            mc.terminationdate
-            FROM dbo.member_coverage mc
-            JOIN dbo.member m ON mc.memberid = m.memberid
-            WHERE m.isterminated = 0
-            AND mc.iscurrent = 1
-            AND CAST(mc.terminationdate AS DATETIME) >= CAST(GETDATE() AS DATETIME)
-            AND m.legacycode LIKE 'CL%';
-        """, medicloud_conn)
-        
-        status_text.text("📋 Loading member plans...")
-        progress_bar.progress(60)
-        M_PLAN = pd.read_sql("SELECT * FROM dbo.member_plan", medicloud_conn)
-        
-        status_text.text("🏢 Loading group plans...")
-        progress_bar.progress(70)
-        G_PLAN = pd.read_sql("""
-            SELECT * FROM dbo.group_plan
-            WHERE iscurrent = 1
-            AND CAST(terminationdate AS DATETIME) >= CAST(GETDATE() AS DATETIME)
-        """, medicloud_conn)
-        
-        status_text.text("📊 Loading plans data...")
-        progress_bar.progress(75)
-        PLAN = pd.read_sql("SELECT * FROM dbo.plans", medicloud_conn)
-        
-        # Additional tables needed for utilization analysis
-        status_text.text("🏥 Loading providers data...")
-        progress_bar.progress(80)
-        PROVIDER = pd.read_sql("""
-            SELECT
-            p.*,
-            l.lganame,
-            s.statename,
-            pc.categoryname
-        FROM
-            dbo.provider p
-            JOIN dbo.providercategory pc ON p.provcatid = pc.provcatid
-        LEFT JOIN
-            dbo.lgas l ON p.lgaid = l.lgaid
-        LEFT JOIN
-            dbo.states s ON p.stateid = s.stateid
-        """, medicloud_conn)
-        
-        status_text.text("💊 Loading benefit codes...")
-        progress_bar.progress(85)
-        BENEFIT = pd.read_sql("SELECT * FROM dbo.benefitcode", medicloud_conn)
-        
-        status_text.text("🔗 Loading benefit procedure codes...")
-        progress_bar.progress(90)
-        BEN_CODE = pd.read_sql("""
-            SELECT
-            bcf.benefitcodeid,
-            bcf.procedurecode,
-            bc.benefitcodename,
-            bc.benefitcodedesc
-            FROM dbo.benefitcode_procedure bcf
-            JOIN dbo.benefitcode bc ON bcf.benefitcodeid = bc.benefitcodeid
-        """, medicloud_conn)
-        
-        medicloud_conn.close()
-        
-        # Connect to EACOUNT database
-        status_text.text("🔌 Connecting to EACOUNT database...")
-        progress_bar.progress(92)
-        eacount_conn = pyodbc.connect(eacount_conn_str)
-        
-        status_text.text("💰 Loading debit notes...")
-        progress_bar.progress(95)
-        DEBIT = pd.read_sql("""
-            SELECT *
+        medicloud_queries = {
+            'GROUP_CONTRACT': """
+                SELECT
+                gc.groupid,
+                gc.startdate,
+                gc.enddate,
+                g.groupname
+                FROM dbo.group_contract gc
+                JOIN dbo.[group] g ON gc.groupid = g.groupid
+                WHERE gc.iscurrent = 1
+                AND gc.enddate >= CAST(GETDATE() AS DATE);
+            """,
+            'CLAIMS': """
+                SELECT nhislegacynumber, nhisproviderid, nhisgroupid, panumber, encounterdatefrom,
+                       datesubmitted, chargeamount, approvedamount, procedurecode, deniedamount
+                FROM dbo.claims
+                WHERE datesubmitted >= ? AND datesubmitted <= GETDATE();
+            """,
+            'GROUPS': "SELECT groupid, groupname FROM dbo.[group]",
+            'PA': """
+                SELECT
+                txn.panumber,
+                txn.groupname,
+                txn.divisionname,
+                txn.plancode,
+                txn.IID,
+                txn.providerid,
+                txn.requestdate,
+                txn.pastatus,
+                tbp.code,
+                tbp.requested,
+                tbp.granted
+                FROM dbo.tbPATxn txn
+                JOIN dbo.tbPAProcedures tbp ON txn.panumber = tbp.panumber
+                WHERE txn.requestdate >= ? AND txn.requestdate <= GETDATE();
+            """,
+            'ACTIVE_ENROLLEE': """
+                SELECT
+                mc.memberid,
+                m.groupid,
+                m.legacycode,
+                m.planid,
+                mc.iscurrent,
+                m.isterminated,
+                mc.effectivedate,
+                mc.terminationdate
+                FROM dbo.member_coverage mc
+                JOIN dbo.member m ON mc.memberid = m.memberid
+                WHERE m.isterminated = 0
+                AND mc.iscurrent = 1
+                AND mc.terminationdate >= CAST(GETDATE() AS DATE)
+                AND m.legacycode LIKE 'CL%';
+            """,
+            'M_PLAN': "SELECT memberid, planid, iscurrent FROM dbo.member_plan",
+            'G_PLAN': """
+                SELECT planid, groupid, individualprice, familyprice, maxnumdependant,
+                       countofindividual, countoffamily
+                FROM dbo.group_plan
+                WHERE iscurrent = 1
+                AND terminationdate >= CAST(GETDATE() AS DATE)
+            """,
+            'PLAN': "SELECT planid, planname FROM dbo.plans",
+            'PROVIDER': """
+                SELECT
+                p.providertin,
+                p.providername
+            FROM
+                dbo.provider p
+                JOIN dbo.providercategory pc ON p.provcatid = pc.provcatid
+            """,
+            'BENEFIT': "SELECT benefitcodeid, benefitcodename, benefitcodedesc FROM dbo.benefitcode",
+            'BEN_CODE': """
+                SELECT
+                bcf.benefitcodeid,
+                bcf.procedurecode,
+                bc.benefitcodename,
+                bc.benefitcodedesc
+                FROM dbo.benefitcode_procedure bcf
+                JOIN dbo.benefitcode bc ON bcf.benefitcodeid = bc.benefitcodeid
+            """
+        }
+        query_params = {
+            'CLAIMS': (CLAIMS_WINDOW_START,),
+            'PA': (CLAIMS_WINDOW_START,),
+        }
+        debit_query = """
+            SELECT [From], Description, CompanyName, Amount
             FROM dbo.DEBIT_Note
-            WHERE [From] >= '2023-01-01' AND [From] <= GETDATE();
-        """, eacount_conn)
-        
-        eacount_conn.close()
-        
+            WHERE [From] >= ? AND [From] <= GETDATE();
+        """
+
+        # The fetches are independent and I/O-bound, so overlap the round-trips;
+        # each worker checks a connection out of the server's pool
+        status_text.text("\U0001F50C Fetching source tables in parallel...")
+        progress_bar.progress(5)
+        medicloud_pool = get_medicloud_pool()
+        lookup_queries = {name: query for name, query in medicloud_queries.items()
+                          if name not in CHUNKED_TABLES}
+        with ThreadPoolExecutor(max_workers=5) as executor:
+            futures = {
+                name: executor.submit(
+                    _fetch_frame_chunked, medicloud_pool,
+                    medicloud_queries[name], query_params.get(name)
+                )
+                for name in CHUNKED_TABLES
+            }
+            futures['LOOKUPS'] = executor.submit(
+                _fetch_frames_batched, medicloud_pool, lookup_queries
+            )
+            futures['DEBIT'] = executor.submit(
+                _fetch_frame, get_eacount_pool(), debit_query, (DEBIT_WINDOW_START,)
+            )
+
+            frames = {}
+            for done, name in enumerate(futures, start=1):
+                result = futures[name].result()
+                if name == 'LOOKUPS':
+                    frames.update(result)
+                else:
+                    frames[name] = result
+                status_text.text(f"\U0001F4CA Loaded {name} ({done}/{len(futures)})...")
+                progress_bar.progress(5 + int(90 * done / len(futures)))
+
+        GROUP_CONTRACT = frames['GROUP_CONTRACT']
+        CLAIMS = frames['CLAIMS']
+        GROUPS = frames['GROUPS']
+        PA = frames['PA']
+        ACTIVE_ENROLLEE = frames['ACTIVE_ENROLLEE']
+        M_PLAN = frames['M_PLAN']
+        G_PLAN = frames['G_PLAN']
+        PLAN = frames['PLAN']
+        PROVIDER = frames['PROVIDER']
+        BENEFIT = frames['BENEFIT']
+        BEN_CODE = frames['BEN_CODE']
+        DEBIT = frames['DEBIT']
+
         # Convert to Polars DataFrames for efficient processing
         status_text.text("🔄 Converting data to Polars format...")
         progress_bar.progress(98)
         GROUP_CONTRACT = pl.from_pandas(GROUP_CONTRACT)
-        CLAIMS = pl.from_pandas(CLAIMS)
         GROUPS = pl.from_pandas(GROUPS)
         DEBIT = pl.from_pandas(DEBIT)
-        PA = pl.from_pandas(PA)
+        # Categorical-encode the repeated string keys so the per-tab
+        # group_by/n_unique aggregations hash small integer codes, not strings
+        PA = PA.with_columns([
+            pl.col('IID').cast(pl.Categorical),
+            pl.col('panumber').cast(pl.Categorical)
+        ])
         ACTIVE_ENROLLEE = pl.from_pandas(ACTIVE_ENROLLEE)
         M_PLAN = pl.from_pandas(M_PLAN)
         G_PLAN = pl.from_pandas(G_PLAN)
@@ -310,21 +478,32 @@ def load_data_from_sources():
         progress_bar.progress(100)
         
         # Clear the progress indicators
-        import time
         time.sleep(1)
         progress_bar.empty()
         status_text.empty()
             
         st.success("✅ Data loaded successfully from source databases!")
+        _write_snapshot((PA, GROUP_CONTRACT, CLAIMS, GROUPS, DEBIT, ACTIVE_ENROLLEE, M_PLAN, G_PLAN, PLAN, PROVIDER, BENEFIT, BEN_CODE))
         return PA, GROUP_CONTRACT, CLAIMS, GROUPS, DEBIT, ACTIVE_ENROLLEE, M_PLAN, G_PLAN, PLAN, PROVIDER, BENEFIT, BEN_CODE
         
     except Exception as e:
         st.error(f"Error loading data from sources: {str(e)}")
         return None, None, None, None, None, None, None, None, None, None, None, None
 
-def send_mlr_alert_email(groupname, mlr_value, mlr_type, threshold, sender_password):
-    """Send email alert for MLR threshold breach"""
+def open_smtp_session(sender_password):
+    """Open one authenticated SMTP session, reused for a whole batch of alerts"""
+    import smtplib
+    server = smtplib.SMTP('smtp.gmail.com', 587)
+    server.starttls()
+    server.login(SENDER_EMAIL, sender_password)
+    return server
+
+def send_mlr_alert_email(groupname, mlr_value, mlr_type, threshold, server, errors):
+    """Send email alert for MLR threshold breach over an open SMTP session"""
     try:
+        from email.mime.text import MIMEText
+        from email.mime.multipart import MIMEMultipart
+        
         # Create message
         msg = MIMEMultipart()
         msg['From'] = SENDER_EMAIL
@@ -348,19 +527,14 @@ MLR Monitoring System
         
         msg.attach(MIMEText(body, 'plain'))
         
-        # Connect to Gmail SMTP server
-        server = smtplib.SMTP('smtp.gmail.com', 587)
-        server.starttls()
-        server.login(SENDER_EMAIL, sender_password)
-        
-        # Send email
+        # Send email over the shared session
         text = msg.as_string()
         server.sendmail(SENDER_EMAIL, RECIPIENTS, text)
-        server.quit()
         
         return True
     except Exception as e:
-        st.error(f"Failed to send email: {str(e)}")
+        # Callers aggregate failures into one summary instead of erroring per row
+        errors.append(f"{groupname} ({mlr_type} ≥{threshold}%): {str(e)}")
         return False
 
 def load_sent_notifications():
@@ -386,34 +560,60 @@ def should_send_notification(groupname, mlr_type, threshold):
 def check_and_send_alerts(pa_merged, claims_merged, sender_password):
     """Check MLR values and send alerts if thresholds are breached"""
     alerts_sent = []
+    email_errors = []
     
+    if pa_merged.height == 0 and claims_merged.height == 0:
+        return alerts_sent
+    
+    # Work out which alerts are actually due before touching the network;
+    # most reruns are fully suppressed by should_send_notification
+    due = []
     if pa_merged.height > 0:
-        pa_df = pa_merged.to_pandas()
-        for _, row in pa_df.iterrows():
-            mlr_value = row['MLR(PA) (%)']
-            groupname = row['groupname']
-            
+        for mlr_value, groupname in pa_merged.select(['MLR(PA) (%)', 'groupname']).iter_rows():
             for threshold in THRESHOLDS:
                 if mlr_value >= threshold and should_send_notification(groupname, 'PA', threshold):
-                    if send_mlr_alert_email(groupname, mlr_value, 'PA', threshold, sender_password):
-                        save_notification(groupname, 'PA', threshold)
-                        alerts_sent.append(f"{groupname} - PA: {mlr_value}% (≥{threshold}%)")
+                    due.append((groupname, mlr_value, 'PA', threshold))
     
     if claims_merged.height > 0:
-        claims_df = claims_merged.to_pandas()
-        for _, row in claims_df.iterrows():
-            mlr_value = row['MLR(CLAIMS) (%)']
-            groupname = row['groupname']
-            
+        for mlr_value, groupname in claims_merged.select(['MLR(CLAIMS) (%)', 'groupname']).iter_rows():
             for threshold in THRESHOLDS:
                 if mlr_value >= threshold and should_send_notification(groupname, 'CLAIMS', threshold):
-                    if send_mlr_alert_email(groupname, mlr_value, 'CLAIMS', threshold, sender_password):
-                        save_notification(groupname, 'CLAIMS', threshold)
-                        alerts_sent.append(f"{groupname} - CLAIMS: {mlr_value}% (≥{threshold}%)")
+                    due.append((groupname, mlr_value, 'CLAIMS', threshold))
+    
+    if not due:
+        return alerts_sent
+    
+    # One TLS handshake + login for the whole batch instead of per email
+    try:
+        server = open_smtp_session(sender_password)
+    except Exception as e:
+        st.error(f"Failed to connect to SMTP server: {str(e)}")
+        return alerts_sent
+    
+    for groupname, mlr_value, mlr_type, threshold in due:
+        if send_mlr_alert_email(groupname, mlr_value, mlr_type, threshold, server, email_errors):
+            save_notification(groupname, mlr_type, threshold)
+            alerts_sent.append(f"{groupname} - {mlr_type}: {mlr_value}% (≥{threshold}%)")
+    
+    try:
+        server.quit()
+    except Exception:
+        pass
+    
+    if email_errors:
+        shown = "; ".join(email_errors[:5])
+        st.error(f"Failed to send {len(email_errors)} alert email(s): {shown}")
     
     return alerts_sent
 
-@st.cache_data(ttl=1800)  # 30 minutes cache for MLR calculations
+def _frame_fingerprint(df):
+    """Cheap stable fingerprint for cached polars frames so cache lookups
+    hash row digests instead of serializing whole frames on every rerun"""
+    if df.height == 0:
+        return (0, tuple(df.columns))
+    return (df.height, tuple(df.columns), int(df.hash_rows().sum()))
+
+@st.cache_data(ttl=1800, hash_funcs={pl.DataFrame: _frame_fingerprint})  # 30 minutes cache for MLR calculations
 def calculate_mlr(PA, GROUP_CONTRACT, CLAIMS, GROUPS, DEBIT):
     """Calculate MLR metrics"""
     try:
@@ -426,11 +626,17 @@ def calculate_mlr(PA, GROUP_CONTRACT, CLAIMS, GROUPS, DEBIT):
             pl.col('startdate').cast(pl.Datetime),
             pl.col('enddate').cast(pl.Datetime)
         ])
-        pa_filtered = PA.join(group_contract_dates, on='groupname', how='inner').filter(
-            (pl.col('requestdate') >= pl.col('startdate')) & (pl.col('requestdate') <= pl.col('enddate'))
-        )
-        PA_mlr = pa_filtered.group_by('groupname').agg(
-            pl.col('granted').sum().alias('Total cost')
+        # Run the PA join/filter/aggregate through the streaming engine
+        # so the 6-month PA x tbPAProcedures expansion never fully materializes
+        PA_mlr = (
+            PA.lazy()
+            .join(group_contract_dates.lazy(), on='groupname', how='inner')
+            .filter(
+                (pl.col('requestdate') >= pl.col('startdate')) & (pl.col('requestdate') <= pl.col('enddate'))
+            )
+            .group_by('groupname')
+            .agg(pl.col('granted').sum().alias('Total cost'))
+            .collect(engine="streaming")
         )
 
         # --- CLAIMS MLR ---
@@ -440,18 +646,21 @@ def calculate_mlr(PA, GROUP_CONTRACT, CLAIMS, GROUPS, DEBIT):
             pl.col('nhisgroupid').cast(pl.Utf8)
         ])
         GROUPS = GROUPS.with_columns(pl.col('groupid').cast(pl.Utf8))
-        claims_with_group = CLAIMS.join(
-            GROUPS.select(['groupid', 'groupname']),
-            left_on='nhisgroupid', right_on='groupid', how='inner'
-        )
-        claims_with_dates = claims_with_group.join(
-            group_contract_dates, on='groupname', how='inner'
-        ).filter(
-            (pl.col('encounterdatefrom') >= pl.col('startdate')) & (pl.col('encounterdatefrom') <= pl.col('enddate'))
+        claims_mlr = (
+            CLAIMS.lazy()
+            .join(
+                GROUPS.lazy().select(['groupid', 'groupname']),
+                left_on='nhisgroupid', right_on='groupid', how='inner'
+            )
+            .join(group_contract_dates.lazy(), on='groupname', how='inner')
+            .filter(
+                (pl.col('encounterdatefrom') >= pl.col('startdate')) & (pl.col('encounterdatefrom') <= pl.col('enddate'))
+            )
+            .group_by('groupname')
+            .agg(pl.col('approvedamount').sum().alias('Total cost'))
+            .sort('Total cost', descending=True)
+            .collect(engine="streaming")
         )
-        claims_mlr = claims_with_dates.group_by('groupname').agg(
-            pl.col('approvedamount').sum().alias('Total cost')
-        ).sort('Total cost', descending=True)
 
         # --- DEBIT NOTE (filtered by contract dates) ---
         # Ensure DEBIT is pandas DataFrame for filtering
@@ -538,7 +747,7 @@ def calculate_mlr(PA, GROUP_CONTRACT, CLAIMS, GROUPS, DEBIT):
         st.error(f"Error calculating MLR: {str(e)}")
         return pl.DataFrame(), pl.DataFrame()
 
-@st.cache_data(ttl=1800)  # 30 minutes cache for retail MLR calculations
+@st.cache_data(ttl=1800, hash_funcs={pl.DataFrame: _frame_fingerprint})  # 30 minutes cache for retail MLR calculations
 def calculate_retail_mlr(PA, ACTIVE_ENROLLEE, M_PLAN, G_PLAN, GROUPS, PLAN):
     try:
         # Ensure consistent data types
@@ -713,6 +922,38 @@ def calculate_retail_mlr(PA, ACTIVE_ENROLLEE, M_PLAN, G_PLAN, GROUPS, PLAN):
         st.error(f"Error calculating retail MLR: {str(e)}")
         return pl.DataFrame(), pl.DataFrame()
 
+@st.cache_data(ttl=1800, hash_funcs={pl.DataFrame: _frame_fingerprint})  # 30 minutes cache for the shared utilization cube
+def build_pa_enriched(PA, PROVIDER, BEN_CODE):
+    """Enrich PA once with provider name, benefit description, month and
+    lowercased procedure code so every utilization tab can slice the same
+    frame instead of redoing the joins per render."""
+    return (
+        PA
+        .join(
+            PROVIDER.select(['providertin', 'providername']),
+            left_on='providerid',
+            right_on='providertin',
+            how='left'
+        )
+        .join(
+            # benefitcode_procedure maps one code to several benefit codes;
+            # dedupe so the 1-to-many join cannot fan out PA rows and inflate
+            # the per-tab granted sums, sorting first so the kept description
+            # is the same on every refresh
+            BEN_CODE.select(['procedurecode', 'benefitcodedesc'])
+            .sort('benefitcodedesc')
+            .unique(subset=['procedurecode'], keep='first', maintain_order=True),
+            left_on='code',
+            right_on='procedurecode',
+            how='left'
+        )
+        .with_columns([
+            pl.col('benefitcodedesc').alias('benefit'),
+            pl.col('requestdate').dt.strftime('%Y-%m').alias('month'),
+            pl.col('code').str.to_lowercase().alias('code_lc')
+        ])
+    )
+
 # Main Streamlit app
 if __name__ == "__main__":
     # Email configuration section
@@ -761,6 +1002,7 @@ if __name__ == "__main__":
     
     # Manual refresh button
     if st.sidebar.button("🔄 Force Refresh Data", help="Clear cache and reload all data"):
+        shutil.rmtree(SNAPSHOT_DIR, ignore_errors=True)
         st.cache_data.clear()
         st.rerun()
     
@@ -1346,10 +1588,12 @@ if __name__ == "__main__":
             st.markdown("---")
             st.subheader("⬇️ Download Raw Utilization Data")
             try:
-                # Convert filtered datasets to pandas for export
-                pa_filtered_pd = pa_filtered.to_pandas() if pa_filtered is not None else pd.DataFrame()
-                claims_filtered_pd = claims_filtered_for_download.to_pandas() if 'claims_filtered_for_download' in locals() else pd.DataFrame()
-                debit_filtered_pd = debit_filtered.copy() if 'debit_filtered' in locals() else pd.DataFrame()
+                # Serialize each dataset once and reuse the bytes for both the
+                # ZIP and the individual buttons; polars writes CSV natively so
+                # the pandas round-trip is gone
+                pa_csv = pa_filtered.write_csv().encode() if pa_filtered is not None else b""
+                claims_csv = claims_filtered_for_download.write_csv().encode() if 'claims_filtered_for_download' in locals() else b""
+                debit_csv = debit_filtered.to_csv(index=False).encode() if 'debit_filtered' in locals() else b""
 
                 # Prepare filenames
                 start_str = current_start_date.strftime('%Y-%m-%d')
@@ -1364,9 +1608,9 @@ if __name__ == "__main__":
                 # Build ZIP in-memory
                 zip_buffer = io.BytesIO()
                 with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as zf:
-                    zf.writestr(pa_name, pa_filtered_pd.to_csv(index=False))
-                    zf.writestr(claims_name, claims_filtered_pd.to_csv(index=False))
-                    zf.writestr(debit_name, debit_filtered_pd.to_csv(index=False))
+                    zf.writestr(pa_name, pa_csv)
+                    zf.writestr(claims_name, claims_csv)
+                    zf.writestr(debit_name, debit_csv)
                 zip_bytes = zip_buffer.getvalue()
 
                 # Single ZIP download button
@@ -1383,21 +1627,21 @@ if __name__ == "__main__":
                     with col_csv1:
                         st.download_button(
                             label="Download PA CSV",
-                            data=pa_filtered_pd.to_csv(index=False),
+                            data=pa_csv,
                             file_name=pa_name,
                             mime='text/csv'
                         )
                     with col_csv2:
                         st.download_button(
                             label="Download Claims CSV",
-                            data=claims_filtered_pd.to_csv(index=False),
+                            data=claims_csv,
                             file_name=claims_name,
                             mime='text/csv'
                         )
                     with col_csv3:
                         st.download_button(
                             label="Download Debit CSV",
-                            data=debit_filtered_pd.to_csv(index=False),
+                            data=debit_csv,
                             file_name=debit_name,
                             mime='text/csv'
                         )
@@ -1407,6 +1651,9 @@ if __name__ == "__main__":
             # Additional Analysis Sections
             st.markdown("---")
             st.subheader("🔍 Additional Analysis Sections")
+
+            # Shared enriched PA frame sliced by every tab below
+            PA_ENRICHED = build_pa_enriched(PA, PROVIDER, BEN_CODE)
             
             tab1, tab2, tab3, tab4, tab5, tab6 = st.tabs([
                 "📈 Utilization Trends", 
@@ -1420,38 +1667,13 @@ if __name__ == "__main__":
             with tab1:
                 # Utilization Trends - Metrics Cards
                 try:
-                    # Filter PA data by selected group and date period
-                    pa_filtered = PA.filter(
+                    # Slice the shared enriched PA frame by group and date period
+                    pa_with_benefit = PA_ENRICHED.filter(
                         (pl.col('groupname') == current_group) &
                         (pl.col('requestdate') >= start_datetime) &
                         (pl.col('requestdate') <= end_datetime)
                     )
 
-                    # Merge pa with provider to get providername
-                    pa_with_provider = pa_filtered.join(
-                        PROVIDER.select(['providertin', 'providername']),
-                        left_on='providerid',
-                        right_on='providertin',
-                        how='left'
-                    )
-
-                    # Merge benefit and ben_code to get benefitcodedesc into ben_code
-                    ben_code_with_desc = BEN_CODE.join(
-                        BENEFIT.select(['benefitcodeid', 'benefitcodedesc']),
-                        on='benefitcodeid',
-                        how='left'
-                    )
-                    
-                    # Merge ben_code_with_desc with pa to get benefitcodedesc into pa as 'benefit'
-                    pa_with_benefit = pa_with_provider.join(
-                        ben_code_with_desc.select(['procedurecode', 'benefitcodedesc']),
-                        left_on='code',
-                        right_on='procedurecode',
-                        how='left'
-                    ).with_columns([
-                        pl.col('benefitcodedesc').alias('benefit')
-                    ])
-
                     # Metrics calculations
                     total_pa_granted = pa_with_benefit.select(pl.col('granted').sum()).item()
                     total_unique_customers = pa_with_benefit.select(pl.col('IID').n_unique()).item()
@@ -1506,10 +1728,7 @@ if __name__ == "__main__":
                         </div>
                     """, unsafe_allow_html=True)
 
-                    # Line chart: PA granted per month
-                    pa_with_benefit = pa_with_benefit.with_columns([
-                        pl.col('requestdate').dt.strftime('%Y-%m').alias('month')
-                    ])
+                    # Line chart: PA granted per month (month precomputed on the enriched frame)
                     monthly_pa = pa_with_benefit.group_by('month').agg(pl.col('granted').sum().alias('total_granted')).sort('month')
                     if monthly_pa.height > 0:
                         st.markdown("#### PA Granted per Month")
@@ -1529,7 +1748,7 @@ if __name__ == "__main__":
                         pl.col('panumber').n_unique().alias('num_visits')
                     ]).with_columns([
                         (pl.col('total_cost') / pl.col('num_visits')).alias('avg_cost_per_visit')
-                    ]).sort('total_cost', descending=True).head(10)
+                    ]).top_k(10, by='total_cost').sort('total_cost', descending=True)
                     st.dataframe(
                         top_customers.to_pandas().rename(columns={
                             'IID': 'Customer ID',
@@ -1545,7 +1764,7 @@ if __name__ == "__main__":
                     top_providers = pa_with_benefit.group_by('providername').agg([
                         pl.col('granted').sum().alias('total_cost'),
                         pl.col('IID').n_unique().alias('unique_customers')
-                    ]).sort('total_cost', descending=True).head(10)
+                    ]).top_k(10, by='total_cost').sort('total_cost', descending=True)
                     st.dataframe(
                         top_providers.to_pandas().rename(columns={
                             'IID': 'Provider ID',
@@ -1560,7 +1779,7 @@ if __name__ == "__main__":
                     # Top 5 benefits by cost
                     top_benefits = pa_with_benefit.group_by('benefit').agg([
                         pl.col('granted').sum().alias('total_cost')
-                    ]).sort('total_cost', descending=True).head(5)
+                    ]).top_k(5, by='total_cost').sort('total_cost', descending=True)
                     st.dataframe(
                         top_benefits.to_pandas().rename(columns={
                             'benefit': 'Benefit',
@@ -1581,21 +1800,14 @@ if __name__ == "__main__":
                         st.warning("No chronic medication codes found in benefits_cleaned.csv")
                         chronic_codes = []
 
-                    # Column to use for procedure code
-                    proc_col = 'procedurecode' if 'procedurecode' in PA.columns else 'code'
 
                     # Filter PA by selected group, date range, and chronic codes
-                    pa_cd = PA
-                    if proc_col == 'code':
-                        pa_cd = pa_cd.with_columns(pl.col(proc_col).str.to_lowercase())
-                    else:
-                        pa_cd = pa_cd.with_columns(pl.col(proc_col).str.to_lowercase())
 
-                    pa_cd = pa_cd.filter(
+                    pa_cd = PA_ENRICHED.filter(
                         (pl.col('groupname') == current_group) &
                         (pl.col('requestdate') >= pd.Timestamp(current_start_date)) &
                         (pl.col('requestdate') <= pd.Timestamp(current_end_date)) &
-                        (pl.col(proc_col).is_in(chronic_codes))
+                        (pl.col('code_lc').is_in(list(chronic_codes)))
                     )
 
                     # Ensure numeric type for granted
@@ -1614,9 +1826,7 @@ if __name__ == "__main__":
 
                     # Monthly cost line chart
                     if pa_cd.height > 0:
-                        pa_cd_monthly = pa_cd.with_columns([
-                            pl.col('requestdate').dt.strftime('%Y-%m').alias('month')
-                        ]).group_by('month').agg(
+                        pa_cd_monthly = pa_cd.group_by('month').agg(
                             pl.col('granted').sum().alias('total_cost')
                         ).sort('month')
 
@@ -1626,13 +1836,8 @@ if __name__ == "__main__":
                             use_container_width=True
                         )
                         
-                        # Merge with provider to get providername
-                        pa_cd_with_provider = pa_cd.join(
-                            PROVIDER.select(['providertin', 'providername']),
-                            left_on='providerid',
-                            right_on='providertin',
-                            how='left'
-                        )
+                        # providername is already joined on the enriched frame
+                        pa_cd_with_provider = pa_cd
                         
                         st.markdown("---")
                         st.markdown("### Top 10 Customers by Chronic Disease Cost")
@@ -1642,7 +1847,7 @@ if __name__ == "__main__":
                             pl.col('panumber').n_unique().alias('num_visits')
                         ]).with_columns([
                             (pl.col('total_cost') / pl.col('num_visits')).alias('avg_cost_per_visit')
-                        ]).sort('total_cost', descending=True).head(10)
+                        ]).top_k(10, by='total_cost').sort('total_cost', descending=True)
                         st.dataframe(
                             top_customers.to_pandas().rename(columns={
                                 'IID': 'Customer ID',
@@ -1658,7 +1863,7 @@ if __name__ == "__main__":
                         top_providers = pa_cd_with_provider.group_by('providername').agg([
                             pl.col('granted').sum().alias('total_cost'),
                             pl.col('IID').n_unique().alias('unique_customers')
-                        ]).sort('total_cost', descending=True).head(10)
+                        ]).top_k(10, by='total_cost').sort('total_cost', descending=True)
                         st.dataframe(
                             top_providers.to_pandas().rename(columns={
                                 'providername': 'Provider Name',
@@ -1682,21 +1887,14 @@ if __name__ == "__main__":
                         st.warning("No surgery codes found in benefits_cleaned.csv")
                         surgery_codes = []
                     
-                    # Column to use for procedure code
-                    proc_col = 'procedurecode' if 'procedurecode' in PA.columns else 'code'
                     
                     # Filter PA by selected group, date range, and surgery codes
-                    pa_cd = PA
-                    if proc_col == 'code':
-                        pa_cd = pa_cd.with_columns(pl.col(proc_col).str.to_lowercase())
-                    else:
-                        pa_cd = pa_cd.with_columns(pl.col(proc_col).str.to_lowercase())
                     
-                    pa_surgery = pa_cd.filter(
+                    pa_surgery = PA_ENRICHED.filter(
                         (pl.col('groupname') == current_group) &
                         (pl.col('requestdate') >= start_datetime) &
                         (pl.col('requestdate') <= end_datetime) &
-                        (pl.col(proc_col).is_in(surgery_codes))
+                        (pl.col('code_lc').is_in(list(surgery_codes)))
                     )
                     
                     if len(pa_surgery) > 0:
@@ -1719,7 +1917,7 @@ if __name__ == "__main__":
                             top_surgeries = pa_surgery.group_by('procedurecode').agg([
                                 pl.col('granted').sum().alias('total_cost'),
                                 pl.col('granted').count().alias('count')
-                            ]).sort('total_cost', descending=True).head(10)
+                            ]).top_k(10, by='total_cost').sort('total_cost', descending=True)
                             
                             st.subheader("Top Surgery Procedures by Cost")
                             st.dataframe(
@@ -1733,9 +1931,7 @@ if __name__ == "__main__":
                         
                         # Monthly cost line chart
                         if pa_surgery.height > 0:
-                            pa_surgery_monthly = pa_surgery.with_columns([
-                                pl.col('requestdate').dt.strftime('%Y-%m').alias('month')
-                            ]).group_by('month').agg(
+                            pa_surgery_monthly = pa_surgery.group_by('month').agg(
                                 pl.col('granted').sum().alias('total_cost')
                             ).sort('month')
 
@@ -1745,13 +1941,8 @@ if __name__ == "__main__":
                                 use_container_width=True
                             )
                         
-                        # Merge with provider to get providername
-                        pa_surgery_with_provider = pa_surgery.join(
-                            PROVIDER.select(['providertin', 'providername']),
-                            left_on='providerid',
-                            right_on='providertin',
-                            how='left'
-                        )
+                        # providername is already joined on the enriched frame
+                        pa_surgery_with_provider = pa_surgery
                         
                         st.markdown("---")
                         st.markdown("### Top 10 Customers by Surgery Cost")
@@ -1761,7 +1952,7 @@ if __name__ == "__main__":
                             pl.col('panumber').n_unique().alias('num_visits')
                         ]).with_columns([
                             (pl.col('total_cost') / pl.col('num_visits')).alias('avg_cost_per_visit')
-                        ]).sort('total_cost', descending=True).head(10)
+                        ]).top_k(10, by='total_cost').sort('total_cost', descending=True)
                         st.dataframe(
                             top_customers.to_pandas().rename(columns={
                                 'IID': 'Customer ID',
@@ -1777,7 +1968,7 @@ if __name__ == "__main__":
                         top_providers = pa_surgery_with_provider.group_by('providername').agg([
                             pl.col('granted').sum().alias('total_cost'),
                             pl.col('IID').n_unique().alias('unique_customers')
-                        ]).sort('total_cost', descending=True).head(10)
+                        ]).top_k(10, by='total_cost').sort('total_cost', descending=True)
                         st.dataframe(
                             top_providers.to_pandas().rename(columns={
                                 'providername': 'Provider Name',
@@ -1801,21 +1992,14 @@ if __name__ == "__main__":
                         st.warning("No maternity codes found in benefits_cleaned.csv")
                         maternity_codes = []
                     
-                    # Column to use for procedure code
-                    proc_col = 'procedurecode' if 'procedurecode' in PA.columns else 'code'
                     
                     # Filter PA by selected group, date range, and maternity codes
-                    pa_cd = PA
-                    if proc_col == 'code':
-                        pa_cd = pa_cd.with_columns(pl.col(proc_col).str.to_lowercase())
-                    else:
-                        pa_cd = pa_cd.with_columns(pl.col(proc_col).str.to_lowercase())
                     
-                    pa_maternity = pa_cd.filter(
+                    pa_maternity = PA_ENRICHED.filter(
                         (pl.col('groupname') == current_group) &
                         (pl.col('requestdate') >= start_datetime) &
                         (pl.col('requestdate') <= end_datetime) &
-                        (pl.col(proc_col).is_in(maternity_codes))
+                        (pl.col('code_lc').is_in(list(maternity_codes)))
                     )
                     
                     if len(pa_maternity) > 0:
@@ -1838,7 +2022,7 @@ if __name__ == "__main__":
                             top_maternity = pa_maternity.group_by('procedurecode').agg([
                                 pl.col('granted').sum().alias('total_cost'),
                                 pl.col('granted').count().alias('count')
-                            ]).sort('total_cost', descending=True).head(10)
+                            ]).top_k(10, by='total_cost').sort('total_cost', descending=True)
                             
                             st.subheader("Top Maternity Procedures by Cost")
                             st.dataframe(
@@ -1852,9 +2036,7 @@ if __name__ == "__main__":
                         
                         # Monthly cost line chart
                         if pa_maternity.height > 0:
-                            pa_maternity_monthly = pa_maternity.with_columns([
-                                pl.col('requestdate').dt.strftime('%Y-%m').alias('month')
-                            ]).group_by('month').agg(
+                            pa_maternity_monthly = pa_maternity.group_by('month').agg(
                                 pl.col('granted').sum().alias('total_cost')
                             ).sort('month')
 
@@ -1864,13 +2046,8 @@ if __name__ == "__main__":
                                 use_container_width=True
                             )
                         
-                        # Merge with provider to get providername
-                        pa_maternity_with_provider = pa_maternity.join(
-                            PROVIDER.select(['providertin', 'providername']),
-                            left_on='providerid',
-                            right_on='providertin',
-                            how='left'
-                        )
+                        # providername is already joined on the enriched frame
+                        pa_maternity_with_provider = pa_maternity
                         
                         st.markdown("---")
                         st.markdown("### Top 10 Customers by Maternity Cost")
@@ -1880,7 +2057,7 @@ if __name__ == "__main__":
                             pl.col('panumber').n_unique().alias('num_visits')
                         ]).with_columns([
                             (pl.col('total_cost') / pl.col('num_visits')).alias('avg_cost_per_visit')
-                        ]).sort('total_cost', descending=True).head(10)
+                        ]).top_k(10, by='total_cost').sort('total_cost', descending=True)
                         st.dataframe(
                             top_customers.to_pandas().rename(columns={
                                 'IID': 'Customer ID',
@@ -1896,7 +2073,7 @@ if __name__ == "__main__":
                         top_providers = pa_maternity_with_provider.group_by('providername').agg([
                             pl.col('granted').sum().alias('total_cost'),
                             pl.col('IID').n_unique().alias('unique_customers')
-                        ]).sort('total_cost', descending=True).head(10)
+                        ]).top_k(10, by='total_cost').sort('total_cost', descending=True)
                         st.dataframe(
                             top_providers.to_pandas().rename(columns={
                                 'providername': 'Provider Name',
@@ -1920,21 +2097,14 @@ if __name__ == "__main__":
                         st.warning("No dental codes found in benefits_cleaned.csv")
                         dental_codes = []
                     
-                    # Column to use for procedure code
-                    proc_col = 'procedurecode' if 'procedurecode' in PA.columns else 'code'
                     
                     # Filter PA by selected group, date range, and dental codes
-                    pa_cd = PA
-                    if proc_col == 'code':
-                        pa_cd = pa_cd.with_columns(pl.col(proc_col).str.to_lowercase())
-                    else:
-                        pa_cd = pa_cd.with_columns(pl.col(proc_col).str.to_lowercase())
                     
-                    pa_dental = pa_cd.filter(
+                    pa_dental = PA_ENRICHED.filter(
                         (pl.col('groupname') == current_group) &
                         (pl.col('requestdate') >= start_datetime) &
                         (pl.col('requestdate') <= end_datetime) &
-                        (pl.col(proc_col).is_in(dental_codes))
+                        (pl.col('code_lc').is_in(list(dental_codes)))
                     )
                     
                     if len(pa_dental) > 0:
@@ -1957,7 +2127,7 @@ if __name__ == "__main__":
                             top_dental = pa_dental.group_by('procedurecode').agg([
                                 pl.col('granted').sum().alias('total_cost'),
                                 pl.col('granted').count().alias('count')
-                            ]).sort('total_cost', descending=True).head(10)
+                            ]).top_k(10, by='total_cost').sort('total_cost', descending=True)
                             
                             st.subheader("Top Dental Procedures by Cost")
                             st.dataframe(
@@ -1971,9 +2141,7 @@ if __name__ == "__main__":
                         
                         # Monthly cost line chart
                         if pa_dental.height > 0:
-                            pa_dental_monthly = pa_dental.with_columns([
-                                pl.col('requestdate').dt.strftime('%Y-%m').alias('month')
-                            ]).group_by('month').agg(
+                            pa_dental_monthly = pa_dental.group_by('month').agg(
                                 pl.col('granted').sum().alias('total_cost')
                             ).sort('month')
 
@@ -1983,13 +2151,8 @@ if __name__ == "__main__":
                                 use_container_width=True
                             )
                         
-                        # Merge with provider to get providername
-                        pa_dental_with_provider = pa_dental.join(
-                            PROVIDER.select(['providertin', 'providername']),
-                            left_on='providerid',
-                            right_on='providertin',
-                            how='left'
-                        )
+                        # providername is already joined on the enriched frame
+                        pa_dental_with_provider = pa_dental
                         
                         st.markdown("---")
                         st.markdown("### Top 10 Customers by Dental Cost")
@@ -1999,7 +2162,7 @@ if __name__ == "__main__":
                             pl.col('panumber').n_unique().alias('num_visits')
                         ]).with_columns([
                             (pl.col('total_cost') / pl.col('num_visits')).alias('avg_cost_per_visit')
-                        ]).sort('total_cost', descending=True).head(10)
+                        ]).top_k(10, by='total_cost').sort('total_cost', descending=True)
                         st.dataframe(
                             top_customers.to_pandas().rename(columns={
                                 'IID': 'Customer ID',
@@ -2015,7 +2178,7 @@ if __name__ == "__main__":
                         top_providers = pa_dental_with_provider.group_by('providername').agg([
                             pl.col('granted').sum().alias('total_cost'),
                             pl.col('IID').n_unique().alias('unique_customers')
-                        ]).sort('total_cost', descending=True).head(10)
+                        ]).top_k(10, by='total_cost').sort('total_cost', descending=True)
                         st.dataframe(
                             top_providers.to_pandas().rename(columns={
                                 'providername': 'Provider Name',
@@ -2039,21 +2202,14 @@ if __name__ == "__main__":
                         st.warning("No optical codes found in benefits_cleaned.csv")
                         optical_codes = []
                     
-                    # Column to use for procedure code
-                    proc_col = 'procedurecode' if 'procedurecode' in PA.columns else 'code'
                     
                     # Filter PA by selected group, date range, and optical codes
-                    pa_cd = PA
-                    if proc_col == 'code':
-                        pa_cd = pa_cd.with_columns(pl.col(proc_col).str.to_lowercase())
-                    else:
-                        pa_cd = pa_cd.with_columns(pl.col(proc_col).str.to_lowercase())
                     
-                    pa_optical = pa_cd.filter(
+                    pa_optical = PA_ENRICHED.filter(
                         (pl.col('groupname') == current_group) &
                         (pl.col('requestdate') >= start_datetime) &
                         (pl.col('requestdate') <= end_datetime) &
-                        (pl.col(proc_col).is_in(optical_codes))
+                        (pl.col('code_lc').is_in(list(optical_codes)))
                     )
                     
                     if len(pa_optical) > 0:
@@ -2076,7 +2232,7 @@ if __name__ == "__main__":
                             top_optical = pa_optical.group_by('procedurecode').agg([
                                 pl.col('granted').sum().alias('total_cost'),
                                 pl.col('granted').count().alias('count')
-                            ]).sort('total_cost', descending=True).head(10)
+                            ]).top_k(10, by='total_cost').sort('total_cost', descending=True)
                             
                             st.subheader("Top Optical Procedures by Cost")
                             st.dataframe(
@@ -2090,9 +2246,7 @@ if __name__ == "__main__":
                         
                         # Monthly cost line chart
                         if pa_optical.height > 0:
-                            pa_optical_monthly = pa_optical.with_columns([
-                                pl.col('requestdate').dt.strftime('%Y-%m').alias('month')
-                            ]).group_by('month').agg(
+                            pa_optical_monthly = pa_optical.group_by('month').agg(
                                 pl.col('granted').sum().alias('total_cost')
                             ).sort('month')
 
@@ -2102,13 +2256,8 @@ if __name__ == "__main__":
                                 use_container_width=True
                             )
                         
-                        # Merge with provider to get providername
-                        pa_optical_with_provider = pa_optical.join(
-                            PROVIDER.select(['providertin', 'providername']),
-                            left_on='providerid',
-                            right_on='providertin',
-                            how='left'
-                        )
+                        # providername is already joined on the enriched frame
+                        pa_optical_with_provider = pa_optical
                         
                         st.markdown("---")
                         st.markdown("### Top 10 Customers by Optical Cost")
@@ -2118,7 +2267,7 @@ if __name__ == "__main__":
                             pl.col('panumber').n_unique().alias('num_visits')
                         ]).with_columns([
                             (pl.col('total_cost') / pl.col('num_visits')).alias('avg_cost_per_visit')
-                        ]).sort('total_cost', descending=True).head(10)
+                        ]).top_k(10, by='total_cost').sort('total_cost', descending=True)
                         st.dataframe(
                             top_customers.to_pandas().rename(columns={
                                 'IID': 'Customer ID',
@@ -2134,7 +2283,7 @@ if __name__ == "__main__":
                         top_providers = pa_optical_with_provider.group_by('providername').agg([
                             pl.col('granted').sum().alias('total_cost'),
                             pl.col('IID').n_unique().alias('unique_customers')
-                        ]).sort('total_cost', descending=True).head(10)
+                        ]).top_k(10, by='total_cost').sort('total_cost', descending=True)
                         st.dataframe(
                             top_providers.to_pandas().rename(columns={
                                 'providername': 'Provider Name',
@@ -0,0 +1,24 @@
+-- Recommended indexes for the MLR dashboard's source queries.
+-- Run on MediCloud after review by the DBA; all are online-friendly
+-- covering indexes sized to the columns the dashboard actually pulls.
+
+-- PA query: tbPATxn filtered on requestdate, joined to tbPAProcedures on
+-- panumber. Covering index turns the date-range scan into a seek and
+-- removes the heap lookups for the projected columns.
+CREATE NONCLUSTERED INDEX IX_tbPATxn_requestdate_covering
+    ON dbo.tbPATxn (requestdate)
+    INCLUDE (panumber, groupname, divisionname, plancode, IID, providerid, pastatus);
+
+CREATE NONCLUSTERED INDEX IX_tbPAProcedures_panumber_covering
+    ON dbo.tbPAProcedures (panumber)
+    INCLUDE (code, requested, granted);
+
+-- CLAIMS query: filtered on datesubmitted with a narrow projection.
+CREATE NONCLUSTERED INDEX IX_claims_datesubmitted_covering
+    ON dbo.claims (datesubmitted)
+    INCLUDE (nhislegacynumber, nhisproviderid, nhisgroupid, panumber,
+             encounterdatefrom, chargeamount, approvedamount,
+             procedurecode, deniedamount);
+
+-- Verify with SET STATISTICS IO, TIME ON that logical reads drop on the
+-- PA and CLAIMS statements before/after.